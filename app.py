@@ -3,14 +3,18 @@ NOC Job Matcher - Web Application
 Match job descriptions to NOC codes using semantic search
 """
 
+import os
+import json
 import streamlit as st
 import numpy as np
-import pickle
+import faiss
+import onnxruntime as ort
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import pandas as pd
+import pyarrow.feather as feather
 import re
-from collections import defaultdict
+import itertools
+from functools import lru_cache
 import html
 
 # Page configuration
@@ -52,51 +56,130 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# Embedding model - queries must be encoded by the same build that encoded the stored corpus
+MODEL_NAME = 'all-mpnet-base-v2'
+
+# Keyword extraction - compiled once at import
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]{3,}\b')
+STOPWORDS = frozenset({
+    'the', 'and', 'for', 'are', 'this', 'that', 'with', 'from', 'will',
+    'have', 'has', 'can', 'our', 'you', 'your', 'their', 'they', 'been',
+    'also', 'such', 'other', 'into', 'more', 'than', 'some', 'about'
+})
+
+# Responsibility extraction - keywords matched as substrings in one alternation
+RESPONSIBILITY_KEYWORDS = [
+    'develop', 'manage', 'create', 'implement', 'design', 'coordinate',
+    'lead', 'supervise', 'analyze', 'maintain', 'ensure', 'provide',
+    'support', 'review', 'prepare', 'conduct', 'monitor', 'plan',
+    'organize', 'direct', 'control', 'evaluate', 'establish', 'perform'
+]
+RESPONSIBILITY_PATTERN = re.compile('|'.join(RESPONSIBILITY_KEYWORDS))
+
+# Artifacts written by prepare_embeddings.py
+EMBEDDING_BACKEND_FILE = 'embedding_backend.json'  # Model build that encoded the corpus
+REQUIRED_DATA_FILES = [
+    'noc_embeddings.npy', 'duty_embeddings.npy', 'noc_metadata.feather', 'duty_offsets.npy', EMBEDDING_BACKEND_FILE
+]
+
+# Minimum similarity for a NOC duty to count as matched
+DUTY_MATCH_THRESHOLD = 0.3
+
 # Cache model and data loading
 @st.cache_resource
 def load_model():
-    """Load the sentence transformer model - upgraded for better accuracy"""
-    return SentenceTransformer('all-mpnet-base-v2')
+    """Load the sentence transformer on the backend recorded next to the corpus embeddings"""
+    with open(EMBEDDING_BACKEND_FILE, encoding='utf-8') as f:
+        backend = json.load(f)
+    if backend.get('model') != MODEL_NAME:
+        raise ValueError(f"Embeddings were built with {backend.get('model')!r}, expected {MODEL_NAME!r}")
+    
+    if backend['backend'] == 'onnx':
+        # Quantized ONNX Runtime graph - load the exact file the corpus was encoded with
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = os.cpu_count() or 1
+        return SentenceTransformer(
+            MODEL_NAME,
+            backend="onnx",
+            model_kwargs={"file_name": backend['file_name'], "session_options": sess_options}
+        )
+    if backend['backend'] == 'torch':
+        # PyTorch weights; a GPU-built (float16) corpus is queried in half precision only on a GPU -
+        # fp16 matmuls are much slower on CPU and fp32 queries score the same against the corpus
+        import torch
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        model = SentenceTransformer(MODEL_NAME, device=device)
+        return model.half() if backend.get('precision') == 'float16' and device == 'cuda' else model
+    raise ValueError(f"Unknown embedding backend {backend['backend']!r} in {EMBEDDING_BACKEND_FILE}")
+
+def normalize_rows(matrix):
+    """Return matrix (float16 on disk) as contiguous float32 with unit-length rows
 
-@st.cache_data
+    Vectors are saved already normalized; renormalizing here removes the float16 rounding error.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix
+
+@st.cache_resource
 def load_noc_data():
-    """Load NOC embeddings and metadata"""
-    embeddings = np.load('noc_embeddings.npy')
-    duty_embeddings = np.load('duty_embeddings.npy')
-    with open('noc_metadata.pkl', 'rb') as f:
-        metadata = pickle.load(f)
+    """Load NOC embeddings (pre-normalized so cosine similarity is a dot product) and metadata"""
+    # Memory-mapped so the float16 files are read straight into the float32 working copy
+    embeddings = normalize_rows(np.load('noc_embeddings.npy', mmap_mode='r'))
+    duty_embeddings = normalize_rows(np.load('duty_embeddings.npy', mmap_mode='r'))
+    
+    # Uncompressed Feather maps straight into Arrow buffers; list columns come back as Python lists
+    metadata = feather.read_table('noc_metadata.feather', memory_map=True).to_pydict()
+    
+    # Duties are stored in NOC order, so the flat list lines up with duty_embeddings rows
+    metadata['all_duties'] = [
+        duty for duties in metadata['main_duties'] for duty in duties if duty and duty.strip()
+    ]
+    metadata['duty_offsets'] = np.load('duty_offsets.npy', mmap_mode='r')
     return embeddings, duty_embeddings, metadata
 
+@st.cache_resource
+def load_duty_index():
+    """Build a FAISS inner-product index over the unit-norm duty embeddings (exact cosine search)"""
+    _, duty_embeddings, _ = load_noc_data()
+    index = faiss.IndexFlatIP(duty_embeddings.shape[1])
+    index.add(duty_embeddings)
+    return index
+
 def extract_keywords(job_description, top_n=20):
-    """Extract key terms from job description"""
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', job_description.lower())
-    stopwords = {'the', 'and', 'for', 'are', 'this', 'that', 'with', 'from', 'will', 
-                 'have', 'has', 'can', 'our', 'you', 'your', 'their', 'they', 'been',
-                 'also', 'such', 'other', 'into', 'more', 'than', 'some', 'about'}
-    keywords = [w for w in words if w not in stopwords and len(w) > 3]
-    return list(set(keywords))
+    """Extract up to top_n distinct key terms from job description, in order of first appearance"""
+    words = WORD_PATTERN.findall(job_description.lower())
+    # dict.fromkeys dedupes in one pass while keeping a deterministic order
+    keywords = dict.fromkeys(w for w in words if len(w) > 3 and w not in STOPWORDS)
+    return list(itertools.islice(keywords, top_n))
 
+@lru_cache(maxsize=4096)
 def highlight_matches(text, keywords):
-    """Highlight matching keywords in text"""
-    if not text or not keywords:
-        return str(text) if text else ""
-    
-    text_str = str(text)
+    """HTML-escape text and highlight matching keywords (a tuple, so calls can be memoized)"""
+    if not text:
+        return ""
+    
+    # Scraped text is rendered with unsafe_allow_html, so escape it before adding any markup.
+    # quote=False keeps quotes literal, so no entity (e.g. &quot;) contains a word a keyword could match
+    text_str = html.escape(str(text), quote=False)
+    if not keywords:
+        return text_str
     
-    # Avoid double-highlighting - check for mark tags (both raw and escaped)
-    if ('<mark' in text_str or '&lt;mark' in text_str):
+    # Keywords are lowercase, so a plain substring test cheaply drops the ones that can't match
+    text_lower = text_str.lower()
+    highlight_keywords = [
+        escaped for escaped in (html.escape(k, quote=False) for k in keywords)
+        if len(escaped) >= 4 and escaped in text_lower
+    ]
+    if not highlight_keywords:
         return text_str
     
-    # Apply highlighting directly (no escaping needed since NOC data is from safe source)
-    highlighted = text_str
-    for keyword in keywords:
-        if len(keyword) < 4:
-            continue
-        # Match keywords case-insensitively
-        pattern = re.compile(r'\b(' + re.escape(keyword) + r')\b', re.IGNORECASE)
-        highlighted = pattern.sub(r'<mark style="background-color: #ffeb3b; padding: 2px 4px; border-radius: 3px;">\1</mark>', highlighted)
+    # One case-insensitive alternation (longest first) so the text is scanned once and
+    # inserted <mark> tags are never re-matched by later keywords
+    highlight_keywords.sort(key=len, reverse=True)
+    pattern = re.compile(r'\b(' + '|'.join(map(re.escape, highlight_keywords)) + r')\b', re.IGNORECASE)
     
-    return highlighted
+    return pattern.sub(r'<mark style="background-color: #ffeb3b; padding: 2px 4px; border-radius: 3px;">\1</mark>', text_str)
 
 def extract_responsibilities(job_description):
     """Extract responsibility sentences from job description"""
@@ -104,49 +187,13 @@ def extract_responsibilities(job_description):
     sentences = re.split(r'[.!?\n]+', job_description)
     
     # Filter for responsibility-like sentences
-    responsibility_keywords = [
-        'develop', 'manage', 'create', 'implement', 'design', 'coordinate',
-        'lead', 'supervise', 'analyze', 'maintain', 'ensure', 'provide',
-        'support', 'review', 'prepare', 'conduct', 'monitor', 'plan',
-        'organize', 'direct', 'control', 'evaluate', 'establish', 'perform'
-    ]
-    
     responsibilities = []
     for sentence in sentences:
         sentence = sentence.strip()
         if len(sentence) < 10:  # Skip very short sentences
             continue
-        # Check if sentence contains responsibility keywords
-        if any(keyword in sentence.lower() for keyword in responsibility_keywords):
-            responsibilities.append(sentence)
-        # Also include sentences that look like bullet points or duties
-        elif sentence and (sentence[0].isupper() or sentence.startswith('-')):
-            responsibilities.append(sentence.lstrip('- •'))
-    
-    # If no responsibilities found, use all sentences
-    if not responsibilities:
-        responsibilities = [s.strip() for s in sentences if len(s.strip()) > 10]
-    
-    return responsibilities[:20]  # Limit to top 20
-    """Extract responsibility sentences from job description"""
-    # Split into sentences
-    sentences = re.split(r'[.!?\n]+', job_description)
-    
-    # Filter for responsibility-like sentences
-    responsibility_keywords = [
-        'develop', 'manage', 'create', 'implement', 'design', 'coordinate',
-        'lead', 'supervise', 'analyze', 'maintain', 'ensure', 'provide',
-        'support', 'review', 'prepare', 'conduct', 'monitor', 'plan',
-        'organize', 'direct', 'control', 'evaluate', 'establish', 'perform'
-    ]
-    
-    responsibilities = []
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if len(sentence) < 10:  # Skip very short sentences
-            continue
-        # Check if sentence contains responsibility keywords
-        if any(keyword in sentence.lower() for keyword in responsibility_keywords):
+        # Check if sentence contains responsibility keywords (single pass over the sentence)
+        if RESPONSIBILITY_PATTERN.search(sentence.lower()):
             responsibilities.append(sentence)
         # Also include sentences that look like bullet points or duties
         elif sentence and (sentence[0].isupper() or sentence.startswith('-')):
@@ -158,78 +205,103 @@ def extract_responsibilities(job_description):
     
     return responsibilities[:20]  # Limit to top 20
 
-def match_duties_to_responsibilities(job_responsibilities, duty_embeddings, metadata, model):
-    """Match job responsibilities to specific NOC duties"""
-    if not job_responsibilities:
-        return {}
-    
-    # Encode job responsibilities
-    resp_embeddings = model.encode(job_responsibilities)
-    
-    # Calculate similarity between each responsibility and each duty
-    similarities = cosine_similarity(resp_embeddings, duty_embeddings)
-    
-    # For each NOC, aggregate duty match scores
-    noc_duty_scores = defaultdict(list)
-    
-    for duty_idx in range(len(metadata['all_duties'])):
-        noc_idx = metadata['duty_to_noc_map'][duty_idx]
-        duty_text = metadata['all_duties'][duty_idx]
-        
-        # Get best match score for this duty across all responsibilities
-        best_score = similarities[:, duty_idx].max()
-        best_resp_idx = similarities[:, duty_idx].argmax()
-        
-        if best_score > 0.3:  # Threshold for relevance
-            noc_duty_scores[noc_idx].append({
-                'duty': duty_text,
-                'score': best_score,
-                'matched_responsibility': job_responsibilities[best_resp_idx]
-            })
-    
-    return noc_duty_scores
+def match_duties_to_responsibilities(resp_embeddings, duty_index, duty_offsets):
+    """Score every NOC's duties against the job responsibilities in one vectorized pass
+    
+    Returns per-NOC arrays (mean of the top 5 matched duties, mean of all matched duties)
+    plus, per duty, the best score and the index of the responsibility it came from.
+    """
+    num_nocs = len(duty_offsets) - 1
+    num_duties = duty_index.ntotal
+    best_scores = np.zeros(num_duties, dtype=np.float32)
+    best_resp_idx = np.zeros(num_duties, dtype=np.int64)
+    if len(resp_embeddings) == 0:
+        return np.zeros(num_nocs), np.zeros(num_nocs), best_scores, best_resp_idx
+    
+    # One batched FAISS range search returns every duty above the threshold for each responsibility
+    hit_bounds, hit_scores, hit_duties = duty_index.range_search(resp_embeddings, DUTY_MATCH_THRESHOLD)
+    hit_resps = np.repeat(np.arange(len(resp_embeddings)), np.diff(hit_bounds.astype(np.int64)))
+    
+    # Best match score for each retrieved duty across all responsibilities
+    order = np.lexsort((-hit_scores, hit_duties))
+    relevant_duties, first_hit = np.unique(hit_duties[order], return_index=True)
+    best_scores[relevant_duties] = hit_scores[order][first_hit]
+    best_resp_idx[relevant_duties] = hit_resps[order][first_hit]
+    
+    # Each NOC owns a contiguous block of duties, so the owning NOC is found from the offsets
+    relevant_nocs = np.searchsorted(duty_offsets, relevant_duties, side='right') - 1
+    relevant_scores = best_scores[relevant_duties]
+    
+    # Order by NOC, best score first, and rank duties within their NOC
+    order = np.lexsort((-relevant_scores, relevant_nocs))
+    relevant_nocs = relevant_nocs[order]
+    relevant_scores = relevant_scores[order]
+    rank = np.arange(len(relevant_nocs)) - np.searchsorted(relevant_nocs, relevant_nocs)
+    in_top = rank < 5
+    
+    # Accumulate per NOC and reduce once at the end
+    match_counts = np.bincount(relevant_nocs, minlength=num_nocs)
+    top_counts = np.minimum(match_counts, 5)
+    top_sums = np.bincount(relevant_nocs[in_top], weights=relevant_scores[in_top], minlength=num_nocs)
+    all_sums = np.bincount(relevant_nocs, weights=relevant_scores, minlength=num_nocs)
+    top_duty_scores = np.divide(top_sums, top_counts, out=np.zeros(num_nocs), where=top_counts > 0)
+    mean_duty_scores = np.divide(all_sums, match_counts, out=np.zeros(num_nocs), where=match_counts > 0)
+    
+    return top_duty_scores, mean_duty_scores, best_scores, best_resp_idx
+
+def get_matched_duties(noc_idx, best_scores, best_resp_idx, job_responsibilities, metadata):
+    """List one NOC's duties above the relevance threshold, best match first"""
+    start, end = metadata['duty_offsets'][noc_idx], metadata['duty_offsets'][noc_idx + 1]
+    group_scores = best_scores[start:end]
+    matched = np.nonzero(group_scores > DUTY_MATCH_THRESHOLD)[0]
+    matched = matched[np.argsort(-group_scores[matched], kind='stable')]
+    
+    return [
+        {
+            'duty': metadata['all_duties'][start + i],
+            'score': group_scores[i],
+            'matched_responsibility': job_responsibilities[best_resp_idx[start + i]]
+        }
+        for i in matched
+    ]
 
-def find_matching_nocs(job_description, model, embeddings, duty_embeddings, metadata, top_k=10):
+def find_matching_nocs(job_description, model, embeddings, duty_index, metadata, top_k=10):
     """Find top matching NOC codes using hybrid approach"""
     
     # Extract responsibilities from job description
     job_responsibilities = extract_responsibilities(job_description)
     
+    # Encode the full description and its responsibilities in a single forward pass
+    texts = [job_description] + job_responsibilities
+    all_embeddings = model.encode(
+        texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+    )
+    job_embedding = all_embeddings[:1]
+    resp_embeddings = all_embeddings[1:]
+    
     # Method 1: Overall semantic similarity (40% weight)
-    job_embedding = model.encode([job_description])
-    overall_similarities = cosine_similarity(job_embedding, embeddings)[0]
+    overall_similarities = (job_embedding @ embeddings.T)[0]
     
     # Method 2: Duty-by-duty matching (60% weight)
-    duty_scores = match_duties_to_responsibilities(
-        job_responsibilities, duty_embeddings, metadata, model
+    top_duty_scores, mean_duty_scores, best_scores, best_resp_idx = match_duties_to_responsibilities(
+        resp_embeddings, duty_index, metadata['duty_offsets']
     )
     
-    # Calculate combined scores
-    combined_scores = []
-    for idx in range(len(metadata['noc_codes'])):
-        overall_score = overall_similarities[idx] * 0.4
-        
-        # Calculate duty match score
-        if idx in duty_scores and duty_scores[idx]:
-            # Average of top matched duties
-            top_duty_scores = sorted([d['score'] for d in duty_scores[idx]], reverse=True)[:5]
-            duty_score = np.mean(top_duty_scores) * 0.6
-        else:
-            duty_score = 0
-        
-        combined_score = overall_score + duty_score
-        combined_scores.append(combined_score)
+    # Combined score - NOCs without matched duties keep only the overall score
+    combined_scores = overall_similarities * 0.4 + top_duty_scores * 0.6
     
-    # Get top K matches
-    top_indices = np.argsort(combined_scores)[::-1][:top_k]
+    # Get top K matches - partition first, then sort only the K survivors
+    k = min(top_k, len(combined_scores))
+    top_candidates = np.argpartition(combined_scores, -k)[-k:]
+    top_indices = top_candidates[np.argsort(combined_scores[top_candidates])[::-1]]
     
-    # Extract keywords for highlighting
-    keywords = extract_keywords(job_description)
+    # Extract keywords for highlighting (tuple so highlight_matches can cache on it)
+    keywords = tuple(extract_keywords(job_description))
     
     results = []
     for idx in top_indices:
-        matched_duties = duty_scores.get(idx, [])
-        matched_duties_sorted = sorted(matched_duties, key=lambda x: x['score'], reverse=True)
+        # Duty text is only materialized for the NOCs that made the final ranking
+        matched_duties = get_matched_duties(idx, best_scores, best_resp_idx, job_responsibilities, metadata)
         
         results.append({
             'noc_code': metadata['noc_codes'][idx],
@@ -242,14 +314,21 @@ def find_matching_nocs(job_description, model, embeddings, duty_embeddings, meta
             'exclusions': metadata['exclusions'][idx],
             'url': metadata['urls'][idx],
             'overall_score': overall_similarities[idx],
-            'duty_match_score': np.mean([d['score'] for d in matched_duties]) if matched_duties else 0,
+            'duty_match_score': mean_duty_scores[idx],
             'similarity_score': combined_scores[idx],
-            'matched_duties': matched_duties_sorted,
+            'matched_duties': matched_duties,
             'keywords': keywords
         })
     
     return results
 
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_find_matching_nocs(job_description, top_k):
+    """Memoized find_matching_nocs keyed on the description text and result count"""
+    model = load_model()
+    embeddings, _, metadata = load_noc_data()
+    return find_matching_nocs(job_description, model, embeddings, load_duty_index(), metadata, top_k)
+
 # Main app
 def main():
     # Header
@@ -257,139 +336,11 @@ def main():
     st.markdown("### Find the best National Occupational Classification (NOC) codes for any job description")
     st.markdown("---")
     
-    # Check if embeddings exist, if not generate them
-    import os
-    if not os.path.exists('noc_embeddings.npy') or not os.path.exists('duty_embeddings.npy'):
-        st.warning("⏳ First-time setup: Generating AI embeddings... This will take 5-7 minutes.")
-        st.info("The app will automatically reload when ready. Please wait...")
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        try:
-            # Import preparation functions
-            status_text.text("Loading NOC data...")
-            progress_bar.progress(10)
-            
-            df = pd.read_csv('noc_data_full.csv')
-            
-            # Parse list fields
-            def parse_list_field(x):
-                if pd.isna(x) or x == '' or x == 'nan':
-                    return []
-                x_str = str(x).strip()
-                if x_str.startswith('['):
-                    try:
-                        return eval(x_str)
-                    except:
-                        return []
-                elif '|' in x_str:
-                    return [item.strip() for item in x_str.split('|') if item.strip()]
-                else:
-                    return []
-            
-            df['main_duties_list'] = df['main_duties'].apply(parse_list_field)
-            df['example_titles_list'] = df['example_titles'].apply(parse_list_field)
-            df['exclusions_list'] = df['exclusions'].apply(parse_list_field)
-            
-            progress_bar.progress(20)
-            status_text.text("Creating searchable text...")
-            
-            # Create searchable text
-            def create_searchable_text(row):
-                parts = []
-                parts.append(f"Title: {row['title']} {row['title']}")
-                parts.append(f"Description: {row['description']}")
-                parts.append(row['description'][:200])
-                
-                if row['main_duties_list']:
-                    main_duties_text = " ".join(row['main_duties_list'])
-                    parts.append(f"Main duties: {main_duties_text}")
-                    parts.append(f"Responsibilities: {main_duties_text}")
-                    parts.append(f"Key duties: {main_duties_text}")
-                
-                if row['example_titles_list']:
-                    parts.append("Example titles: " + " ".join(row['example_titles_list']))
-                
-                if pd.notna(row['employment_requirements']) and row['employment_requirements']:
-                    parts.append(f"Requirements: {row['employment_requirements']}")
-                
-                if pd.notna(row['additional_information']) and row['additional_information']:
-                    parts.append(str(row['additional_information'])[:100])
-                
-                if row['exclusions_list']:
-                    parts.append("Exclusions: " + " ".join(row['exclusions_list'][:3]))
-                
-                if pd.notna(row['broad_category']) and row['broad_category']:
-                    parts.append(f"Category: {row['broad_category']}")
-                if pd.notna(row['major_group']) and row['major_group']:
-                    parts.append(f"Group: {row['major_group']}")
-                
-                return " ".join(filter(None, parts))
-            
-            df['searchable_text'] = df.apply(create_searchable_text, axis=1)
-            
-            progress_bar.progress(30)
-            status_text.text("Loading AI model (this may take a minute)...")
-            
-            model = SentenceTransformer('all-mpnet-base-v2')
-            
-            progress_bar.progress(40)
-            status_text.text(f"Generating profile embeddings for {len(df)} NOC codes...")
-            
-            embeddings = model.encode(df['searchable_text'].tolist(), batch_size=32, show_progress_bar=False)
-            
-            progress_bar.progress(60)
-            status_text.text("Generating duty-level embeddings...")
-            
-            all_duties = []
-            duty_to_noc_map = []
-            
-            for idx, row in df.iterrows():
-                if row['main_duties_list']:
-                    for duty in row['main_duties_list']:
-                        if duty and duty.strip():
-                            all_duties.append(duty)
-                            duty_to_noc_map.append(idx)
-            
-            duty_embeddings = model.encode(all_duties, batch_size=32, show_progress_bar=False)
-            
-            progress_bar.progress(80)
-            status_text.text("Saving embeddings...")
-            
-            np.save('noc_embeddings.npy', embeddings)
-            np.save('duty_embeddings.npy', duty_embeddings)
-            
-            metadata = {
-                'noc_codes': df['noc_code'].tolist(),
-                'titles': df['title'].tolist(),
-                'descriptions': df['description'].tolist(),
-                'main_duties': df['main_duties_list'].tolist(),
-                'example_titles': df['example_titles_list'].tolist(),
-                'employment_requirements': df['employment_requirements'].tolist(),
-                'additional_information': df['additional_information'].tolist(),
-                'exclusions': df['exclusions_list'].tolist(),
-                'urls': df['url'].tolist(),
-                'searchable_texts': df['searchable_text'].tolist(),
-                'all_duties': all_duties,
-                'duty_to_noc_map': duty_to_noc_map
-            }
-            
-            with open('noc_metadata.pkl', 'wb') as f:
-                pickle.dump(metadata, f)
-            
-            progress_bar.progress(100)
-            status_text.text("✅ Embeddings generated successfully!")
-            
-            st.success(f"Generated {len(embeddings)} profile embeddings and {len(duty_embeddings)} duty embeddings!")
-            st.info("Reloading app...")
-            st.rerun()
-            
-        except Exception as e:
-            st.error(f"❌ Error generating embeddings: {str(e)}")
-            import traceback
-            st.code(traceback.format_exc())
-            st.stop()
+    # Embeddings and metadata are generated offline by prepare_embeddings.py
+    missing_files = [path for path in REQUIRED_DATA_FILES if not os.path.exists(path)]
+    if missing_files:
+        st.error(f"❌ Missing data files: {', '.join(missing_files)}. Run `python prepare_embeddings.py` to generate them.")
+        st.stop()
     
     # Sidebar
     with st.sidebar:
@@ -405,9 +356,11 @@ def main():
     
     # Load model and data
     try:
+        # Warm the cached resources here so the first search does not pay for loading them
         with st.spinner("Loading AI model and NOC database..."):
-            model = load_model()
+            load_model()
             embeddings, duty_embeddings, metadata = load_noc_data()
+            load_duty_index()
         
         st.success(f"✅ Loaded {len(metadata['noc_codes'])} NOC codes with {len(metadata['all_duties'])} individual duties")
         
@@ -415,7 +368,7 @@ def main():
         st.error(f"""
         ❌ **Embeddings not found!**
         
-        The app needs to generate embeddings first. Please refresh the page.
+        Run `python prepare_embeddings.py` to generate them, then restart the app.
         
         Error details: {str(e)}
         """)
@@ -444,7 +397,7 @@ def main():
     # Search functionality
     if search_button and job_description.strip():
         with st.spinner("🔍 Analyzing job description and finding matches..."):
-            results = find_matching_nocs(job_description, model, embeddings, duty_embeddings, metadata, top_k)
+            results = cached_find_matching_nocs(job_description.strip(), top_k)
         
         st.markdown("---")
         st.header(f"🎯 Top {len(results)} Matching NOC Codes")
@@ -501,6 +454,8 @@ def main():
                 # Matched Duties with Scores
                 if result['matched_duties']:
                     with st.expander(f"🎯 Matched Duties ({len(result['matched_duties'])} matches)", expanded=True):
+                        # Build the whole expander body and send it in one markdown call
+                        match_html = []
                         for match in result['matched_duties'][:5]:  # Show top 5
                             match_pct = match['score'] * 100
                             if match_pct >= 70:
@@ -514,7 +469,7 @@ def main():
                             duty_text = html.escape(match['duty'])
                             resp_text = html.escape(match['matched_responsibility'])
                             
-                            st.markdown(f"""
+                            match_html.append(f"""
                             <div style="background-color: #f8f9fa; padding: 0.75rem; border-radius: 5px; margin-bottom: 0.5rem; border-left: 3px solid {badge_color};">
                                 <div style="display: flex; justify-content: space-between; align-items: start;">
                                     <div style="flex: 1;">
@@ -526,23 +481,26 @@ def main():
                                     </span>
                                 </div>
                             </div>
-                            """, unsafe_allow_html=True)
+                            """)
+                        st.markdown("\n".join(match_html), unsafe_allow_html=True)
                 
                 # All Main Duties
                 with st.expander("📋 All Main Duties"):
                     if result['main_duties'] and len(result['main_duties']) > 0:
-                        for duty in result['main_duties']:
-                            if duty and duty.strip():
-                                st.markdown(f"• {duty}")
+                        duty_lines = [
+                            f"• {highlight_matches(duty, result['keywords'])}"
+                            for duty in result['main_duties'] if duty and duty.strip()
+                        ]
+                        st.markdown("<br>".join(duty_lines), unsafe_allow_html=True)
                     else:
                         st.info("No detailed duties available")
                 
                 # Example Titles
                 with st.expander("💼 View Example Job Titles"):
                     if result['example_titles'] and len(result['example_titles']) > 0:
-                        for title in result['example_titles']:
-                            if title and title.strip():
-                                st.markdown(f"• {title}")
+                        st.markdown("  \n".join(
+                            f"• {title}" for title in result['example_titles'] if title and title.strip()
+                        ))
                     else:
                         st.info("No example titles available")
                 
@@ -551,8 +509,7 @@ def main():
                     with st.expander("📚 Employment Requirements"):
                         st.markdown(str(result['employment_requirements']))
                 
-                st.markdown(f"🔗 [View Full NOC Profile]({result['url']})")
-                st.markdown("---")
+                st.markdown(f"🔗 [View Full NOC Profile]({result['url']})\n\n---")
         
         # Export results
         st.header("📥 Export Results")
@@ -5,18 +5,171 @@ Scrapes all NOC codes, titles, descriptions, hierarchy, and detailed profiles fr
 
 import json
 import csv
+import argparse
 import time
+import asyncio
+from io import BytesIO
 from datetime import datetime
+import httpx
+from lxml import etree, html as lxml_html
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import pandas as pd
 
 
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Stamped on every progress-file line - bump whenever profile parsing changes, so a resumed run
+# re-fetches profiles parsed by older code instead of keeping them
+PROFILE_PARSER_VERSION = 2
+
+# Chromium profile kept between runs so the HTTP cache stays warm for re-scrapes
+BROWSER_PROFILE_DIR = './.noc_browser_profile'
+
+# Resource types the extractor never reads - aborted before they hit the network
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+def _block_heavy_resources(route):
+    """Route handler that aborts assets not needed to read the hierarchy"""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+def _text(elem):
+    """Whitespace-normalized text of an lxml element (close to Playwright's inner_text)"""
+    return ' '.join(etree.tostring(elem, method='text', encoding='unicode', with_tail=False).split())
+
+
+def _is_rendered(elem):
+    """Best-effort static check that an element would be visible in the browser"""
+    for node in elem.iterancestors():
+        if node.get('hidden') is not None or 'display:none' in (node.get('style') or '').replace(' ', ''):
+            return False
+        if node.tag == 'details' and node.get('open') is None:
+            return False
+    return True
+
+
+def _class_test(*classes):
+    """XPath predicate matching elements that carry all of the given CSS classes"""
+    return ' and '.join(f'contains(concat(" ", normalize-space(@class), " "), " {cls} ")' for cls in classes)
+
+
+def _section(heading, tag='*'):
+    """XPath for the siblings after an h4 heading, stopping at the next h4 (profile pages are flat)"""
+    return (
+        f'//h4[contains(., "{heading}")]'
+        f'/following-sibling::{tag}[preceding-sibling::h4[1][contains(., "{heading}")]]'
+    )
+
+
+# Profile breakdown fields and the label that precedes each value's link
+BREAKDOWN_LABELS = {
+    'broad_category': 'Broad occupational category',
+    'major_group': 'Major group',
+    'sub_major_group': 'Sub-major group',
+    'minor_group': 'Minor group',
+}
+
+# Every query used on profile and hierarchy pages, compiled once at import
+_XPATHS = {
+    # Profile pages
+    # Each section is bounded by the next h4, so a section never picks up a later section's lists
+    'example_titles': etree.XPath(
+        _section("Example titles", 'ul') + '//li | ' + _section("Example titles", 'div') + '//li'
+    ),
+    'index_of_titles_button': etree.XPath('//*[normalize-space(text())="Index of titles"]'),
+    'index_of_titles': etree.XPath(_section("Example titles") + '//li'),
+    'main_duties': etree.XPath(
+        _section("Main duties", 'ul') + '//li'
+        ' | //h5[contains(., "This group performs")]/following-sibling::ul[1]//li'
+    ),
+    'employment_requirements_items': etree.XPath(_section("Employment requirements", 'ul') + '//li'),
+    'employment_requirements_paragraphs': etree.XPath(_section("Employment requirements", 'p')),
+    'additional_information_items': etree.XPath(_section("Additional information", 'ul') + '//li'),
+    'additional_information_paragraphs': etree.XPath(_section("Additional information", 'p')),
+    'exclusions': etree.XPath(_section("Exclusions", 'ul') + '//li'),
+    **{
+        key: etree.XPath(f'(//strong[contains(., "{label}")]/following-sibling::a)[1]')
+        for key, label in BREAKDOWN_LABELS.items()
+    },
+    'teer': etree.XPath('(//strong[contains(., "TEER")])[1]/..'),
+    # Hierarchy <details> sections
+    'summary': etree.XPath('./summary'),
+    'summary_id': etree.XPath('.//*[@id]'),
+    'badge': etree.XPath(f'.//*[{_class_test("badge", "nocCode")}]'),
+    'noc_title': etree.XPath(f'.//*[{_class_test("nocTitle")}]'),
+    'full_title': etree.XPath(f'.//*[{_class_test("noFontStyle")}]'),
+    'description': etree.XPath('./p'),
+    'profile_link': etree.XPath('.//a[contains(@href, "NOCProfile")]'),
+}
+
+
+def _first_text(elem, query):
+    """Text of the first element matched by a compiled query, or None if there is none"""
+    found = _XPATHS[query](elem)
+    return _text(found[0]) if found else None
+
+
+def _hierarchy_record(details):
+    """Raw fields of one hierarchy <details> section"""
+    summary = _XPATHS['summary'](details)
+    summary = summary[0] if summary else None
+    id_elems = _XPATHS['summary_id'](summary) if summary is not None else []
+    profile_links = _XPATHS['profile_link'](details)
+    return {
+        # A summary is shown whenever its own <details> is rendered
+        'visible': summary is not None and _is_rendered(details),
+        'summary_id': id_elems[0].get('id') if id_elems else None,
+        'badge': _first_text(summary, 'badge') if summary is not None else None,
+        'noc_title': _first_text(summary, 'noc_title') if summary is not None else None,
+        'full_title': _first_text(summary, 'full_title') if summary is not None else None,
+        'description': _first_text(details, 'description'),
+        'has_profile_link': bool(profile_links),
+        'profile_href': profile_links[0].get('href') if profile_links else None,
+    }
+
+
 class NOCScraper:
-    def __init__(self, scrape_profiles=True):
+    def __init__(self, scrape_profiles=True, max_concurrency=8, progress_file='noc_data_full.jsonl', resume=True):
         self.base_url = "https://noc.esdc.gc.ca/Structure/Hierarchy"
         self.noc_data = []
+        self._seen_codes = set()  # NOC codes already in noc_data
         self.errors = []
         self.scrape_profiles = scrape_profiles  # Whether to scrape detailed profiles
+        self.max_concurrency = max_concurrency  # Profile pages fetched at once (keep 5-10 to avoid rate limiting)
+        # Every completed profile is appended here, so an interrupted run resumes where it stopped.
+        # resume=False discards the file and re-scrapes every profile.
+        self.progress_file = progress_file
+        self.resume = resume
+        self._completed_profiles = self._load_progress() if resume else {}
+    
+    def _load_progress(self):
+        """Load entries whose profiles were completed by an earlier run, keyed by NOC code"""
+        completed = {}
+        stale = 0
+        try:
+            with open(self.progress_file, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Partially written last line from a crash
+                    if not isinstance(record, dict) or record.get('parser_version') != PROFILE_PARSER_VERSION:
+                        stale += 1  # Parsed by an older scraper - fetch it again
+                        continue
+                    completed[record['entry']['noc_code']] = record['entry']
+        except FileNotFoundError:
+            pass
+        
+        if stale:
+            print(f"♻️  Ignoring {stale} profiles in {self.progress_file} from an older parser version")
+        if completed:
+            print(f"♻️  Resuming: {len(completed)} profiles already saved in {self.progress_file}")
+        return completed
         
     def scrape(self, headless=True):
         """Main scraping method"""
@@ -24,13 +177,17 @@ class NOCScraper:
         print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         with sync_playwright() as p:
-            # Launch browser
-            browser = p.chromium.launch(headless=headless)
-            context = browser.new_context(
+            # Launch browser with a persistent profile (reuses cached responses from earlier runs)
+            context = p.chromium.launch_persistent_context(
+                user_data_dir=BROWSER_PROFILE_DIR,
+                headless=headless,
                 viewport={'width': 1920, 'height': 1080},
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             )
-            page = context.new_page()
+            # Skip images, fonts and media; stylesheets still load because visibility checks need the layout
+            context.route("**/*", _block_heavy_resources)
+            # A persistent context opens with a blank tab - use it rather than adding another
+            page = context.pages[0] if context.pages else context.new_page()
             
             try:
                 # Navigate to the page
@@ -57,19 +214,24 @@ class NOCScraper:
                 print("🔍 Extracting NOC data...")
                 self._extract_hierarchy(page)
                 
-                # Extract detailed profiles if enabled
-                if self.scrape_profiles and len(self.noc_data) > 0:
-                    print(f"\n📋 Extracting detailed profiles for {len(self.noc_data)} NOC entries...")
-                    self._extract_all_profiles(page)
-                
-                print(f"\n✅ Successfully scraped {len(self.noc_data)} NOC entries")
-                
             except Exception as e:
                 print(f"\n❌ Error during scraping: {str(e)}")
                 self.errors.append(f"Main scraping error: {str(e)}")
             
             finally:
-                browser.close()
+                context.close()
+        
+        # Extract detailed profiles if enabled - runs on its own event loop, so it must
+        # start after the sync Playwright session has shut down
+        if self.scrape_profiles and len(self.noc_data) > 0:
+            try:
+                print(f"\n📋 Extracting detailed profiles for {len(self.noc_data)} NOC entries...")
+                self._extract_all_profiles()
+            except Exception as e:
+                print(f"\n❌ Error during profile extraction: {str(e)}")
+                self.errors.append(f"Profile extraction error: {str(e)}")
+        
+        print(f"\n✅ Successfully scraped {len(self.noc_data)} NOC entries")
         
         return self.noc_data
     
@@ -83,21 +245,37 @@ class NOCScraper:
                 time.sleep(3)  # Wait for expansion
                 print("   ✓ Clicked 'Expand all' button")
             else:
-                # Manually expand each broad category
+                # Manually expand each broad category - in one in-page call, click only the visible
+                # toggles whose panel is still collapsed (clicking an open panel would close it)
                 print("   ⚙️  Manually expanding categories...")
-                broad_categories = page.locator('.panel-heading a[data-toggle="collapse"]').all()
-                print(f"   Found {len(broad_categories)} broad categories")
+                opened = page.evaluate("""() => {
+                    const opened = [];
+                    document.querySelectorAll('.panel-heading a[data-toggle="collapse"]').forEach((toggle) => {
+                        const target = toggle.getAttribute('data-target') || toggle.getAttribute('href');
+                        let panel = null;
+                        try {
+                            panel = target ? document.querySelector(target) : null;
+                        } catch (e) {
+                            panel = null;  // href is not a selector
+                        }
+                        if (panel && !panel.classList.contains('in') && toggle.getClientRects().length > 0) {
+                            toggle.click();
+                            opened.push(target);
+                        }
+                    });
+                    return opened;
+                }""")
+                print(f"   Expanding {len(opened)} collapsed categories")
                 
-                for i, category in enumerate(broad_categories):
-                    try:
-                        if category.is_visible():
-                            category.click()
-                            time.sleep(0.5)
-                    except:
-                        pass
-                
-                # Wait for all content to load
-                time.sleep(2)
+                # Wait for all content to load - until every panel clicked above is open
+                try:
+                    page.wait_for_function(
+                        "targets => targets.every((target) => document.querySelector(target).classList.contains('in'))",
+                        arg=opened,
+                        timeout=30000
+                    )
+                except PlaywrightTimeoutError:
+                    print("   ⚠️  Not every category reported as expanded, continuing anyway...")
                 
         except Exception as e:
             print(f"   ⚠️  Could not expand all sections: {str(e)}")
@@ -105,26 +283,46 @@ class NOCScraper:
     def _extract_hierarchy(self, page):
         """Extract the full NOC hierarchy from the page"""
         try:
-            # The data is in nested <details> tags
-            # Get all details elements
-            all_details = page.locator('details.nocDetails').all()
-            print(f"   Found {len(all_details)} NOC detail sections")
+            # The data is in nested <details> tags - grab the expanded page once and
+            # stream-parse it, handling each section as its closing tag is reached
+            records = {'details': [], 'unit_groups': []}
+            open_sections = []  # (records list, slot) for each <details> currently being parsed
+            content = BytesIO(page.content().encode('utf-8'))
+            for event, elem in etree.iterparse(content, events=('start', 'end'), tag='details', html=True):
+                if event == 'start':
+                    # Reserve the slot on the opening tag so sections keep document order
+                    classes = (elem.get('class') or '').split()
+                    target = records['details'] if 'nocDetails' in classes else (
+                        records['unit_groups'] if 'nocLI' in classes else None)
+                    if target is not None:
+                        target.append(None)
+                        open_sections.append((target, len(target) - 1))
+                    else:
+                        open_sections.append(None)
+                    continue
+                
+                section = open_sections.pop()
+                if section is not None:
+                    target, slot = section
+                    target[slot] = _hierarchy_record(elem)
+                # Nested sections are already recorded - free them, keeping the parent's structure
+                elem.clear(keep_tail=True)
+            print(f"   Found {len(records['details'])} NOC detail sections")
             
             # Also get unit group links (the final level with profiles)
-            unit_groups = page.locator('details.nocLI').all()
-            print(f"   Found {len(unit_groups)} unit groups")
+            print(f"   Found {len(records['unit_groups'])} unit groups")
             
             # Extract data from all details sections
-            for detail in all_details:
+            for record in records['details']:
                 try:
-                    self._extract_detail_data(detail, page)
+                    self._extract_detail_data(record)
                 except Exception as e:
                     pass
             
             # Extract unit groups
-            for unit_group in unit_groups:
+            for record in records['unit_groups']:
                 try:
-                    self._extract_unit_group_data(unit_group, page)
+                    self._extract_unit_group_data(record)
                 except Exception as e:
                     pass
                     
@@ -132,27 +330,22 @@ class NOCScraper:
             print(f"   ❌ Hierarchy extraction error: {str(e)}")
             self.errors.append(f"Hierarchy extraction error: {str(e)}")
     
-    def _extract_detail_data(self, detail_element, page):
-        """Extract data from a details element (non-unit group)"""
+    def _extract_detail_data(self, record):
+        """Extract data from a details record (non-unit group)"""
         try:
-            # Get the summary element
-            summary = detail_element.locator('> summary').first
-            if not summary.is_visible():
+            # Skip sections whose summary is not rendered
+            if not record['visible']:
                 return
             
-            # Get the ID from the summary (this is the NOC code)
-            summary_id_elem = summary.locator('[id]').first
-            if summary_id_elem.count() == 0:
+            # The ID on the summary is the NOC code
+            noc_code = record['summary_id']
+            if noc_code is None:
                 return
-                
-            noc_code = summary_id_elem.get_attribute('id')
             
-            # Get the full title text from the noFontStyle span
-            title_element = summary.locator('.noFontStyle').first
-            if title_element.count() == 0:
+            # Full title text from the noFontStyle span
+            full_text = record['full_title']
+            if full_text is None:
                 return
-                
-            full_text = title_element.inner_text().strip()
             
             # Remove the badge/code number from the beginning
             # The text looks like "10 Specialized middle management..."
@@ -160,19 +353,11 @@ class NOCScraper:
             title = ' '.join(full_text.split()[1:]) if ' ' in full_text else full_text
             
             # Check if already processed
-            if any(item['noc_code'] == noc_code for item in self.noc_data):
+            if noc_code in self._seen_codes:
                 return
             
-            # Get the first description paragraph if available (direct child only)
-            description_element = detail_element.locator('> p').first
-            description = ""
-            if description_element.count() > 0:
-                try:
-                    description = description_element.inner_text().strip()
-                except:
-                    description = f"{title}"
-            else:
-                description = f"{title}"
+            # First description paragraph if available (direct child only)
+            description = record['description'] if record['description'] is not None else f"{title}"
             
             # Determine level
             level = self._determine_level(noc_code)
@@ -184,59 +369,46 @@ class NOCScraper:
                 'level': level,
                 'url': f"https://noc.esdc.gc.ca/Structure/Hierarchy#{noc_code}"
             })
+            self._seen_codes.add(noc_code)
             
             print(f"   ✓ {noc_code}: {title[:50]}...")
             
         except Exception as e:
             pass  # Silent fail for individual items
     
-    def _extract_unit_group_data(self, unit_group_element, page):
-        """Extract data from a unit group element (final level with profile link)"""
+    def _extract_unit_group_data(self, record):
+        """Extract data from a unit group record (final level with profile link)"""
         try:
-            # Get the summary element
-            summary = unit_group_element.locator('> summary').first
-            if not summary.is_visible():
+            # Skip sections whose summary is not rendered
+            if not record['visible']:
                 return
             
-            # Get the NOC code from the badge with nocCode class
-            badge = summary.locator('.badge.nocCode').first
-            if badge.count() == 0:
+            # NOC code from the badge with nocCode class
+            noc_code = record['badge']
+            if noc_code is None:
                 return
-                
-            noc_code = badge.inner_text().strip()
             
-            # Get the title from the nocTitle span
-            title_element = summary.locator('.nocTitle').first
-            if title_element.count() > 0:
-                title = title_element.inner_text().strip()
+            # Title from the nocTitle span
+            if record['noc_title'] is not None:
+                title = record['noc_title']
             else:
                 # Fallback to extracting from full text
-                title_element = summary.locator('.noFontStyle').first
-                if title_element.count() == 0:
+                full_text = record['full_title']
+                if full_text is None:
                     return
-                full_text = title_element.inner_text().strip()
                 title = ' '.join(full_text.split()[1:]) if ' ' in full_text else full_text
             
             # Check if already processed
-            if any(item['noc_code'] == noc_code for item in self.noc_data):
+            if noc_code in self._seen_codes:
                 return
             
-            # Get the description paragraph (direct child)
-            description_element = unit_group_element.locator('> p').first
-            description = ""
-            if description_element.count() > 0:
-                try:
-                    description = description_element.inner_text().strip()
-                except:
-                    description = title
-            else:
-                description = title
+            # Description paragraph (direct child)
+            description = record['description'] if record['description'] is not None else title
             
-            # Get the profile link
-            profile_link = unit_group_element.locator('a[href*="NOCProfile"]').first
+            # Profile link
             url = "https://noc.esdc.gc.ca/Structure/Hierarchy"
-            if profile_link.count() > 0:
-                href = profile_link.get_attribute('href')
+            if record['has_profile_link']:
+                href = record['profile_href']
                 url = f"https://noc.esdc.gc.ca{href}" if href and href.startswith('/') else href
             
             # Determine level
@@ -249,34 +421,79 @@ class NOCScraper:
                 'level': level,
                 'url': url
             })
+            self._seen_codes.add(noc_code)
             
             print(f"   ✓ {noc_code}: {title[:50]}...")
             
         except Exception as e:
             pass  # Silent fail for individual items
     
-    def _extract_all_profiles(self, page):
+    def _extract_all_profiles(self):
         """Extract detailed profiles for all NOC entries"""
+        asyncio.run(self._extract_all_profiles_async())
+    
+    async def _extract_all_profiles_async(self):
+        """Fetch all profiles concurrently, at most max_concurrency at a time"""
         total = len(self.noc_data)
-        for idx, noc_entry in enumerate(self.noc_data, 1):
+        self._profiles_done = 0
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # Restore profiles finished by an earlier run instead of fetching them again
+        pending = []
+        for noc_entry in self.noc_data:
+            completed = self._completed_profiles.get(noc_entry['noc_code'])
+            if completed is not None:
+                noc_entry.update(completed)
+                self._profiles_done += 1
+            else:
+                pending.append(noc_entry)
+        
+        # Profile pages are static HTML - fetch them over one shared HTTP client instead of a browser.
+        # Concurrency is bounded by the semaphore; HTTP/2 multiplexes the requests as streams on one connection.
+        with open(self.progress_file, 'a' if self.resume else 'w', encoding='utf-8') as progress:
+            async with httpx.AsyncClient(http2=True, headers=HTTP_HEADERS, timeout=30, follow_redirects=True) as client:
+                tasks = [
+                    self._bounded_extract(semaphore, client, noc_entry, total, progress)
+                    for noc_entry in pending
+                ]
+                await asyncio.gather(*tasks)
+        
+        print(f"   ✅ Completed extracting {total} profiles")
+    
+    async def _bounded_extract(self, semaphore, client, noc_entry, total, progress):
+        """Extract one profile while holding a concurrency slot"""
+        async with semaphore:
             try:
-                if idx % 10 == 0 or idx == 1:
-                    print(f"   Progress: {idx}/{total} profiles extracted...")
-                
-                profile_url = noc_entry['url']
-                profile_data = self._extract_profile_details(page, profile_url)
+                profile_data = await self._extract_profile_details(client, noc_entry['url'])
                 
                 # Merge profile data into the NOC entry
                 noc_entry.update(profile_data)
                 
-                time.sleep(0.3)  # Rate limiting
+                # Record the finished entry straight away so a crash does not lose it
+                record = {
+                    'parser_version': PROFILE_PARSER_VERSION,
+                    'scraped_at': datetime.now().isoformat(timespec='seconds'),
+                    'entry': noc_entry,
+                }
+                progress.write(json.dumps(record, ensure_ascii=False) + '\n')
+                progress.flush()
+                
+                await asyncio.sleep(0.3)  # Rate limiting
                 
             except Exception as e:
                 self.errors.append(f"Profile extraction error for {noc_entry['noc_code']}: {str(e)}")
-        
-        print(f"   ✅ Completed extracting {total} profiles")
+            
+            self._profiles_done += 1
+            if self._profiles_done % 10 == 0 or self._profiles_done == 1:
+                print(f"   Progress: {self._profiles_done}/{total} profiles extracted...")
+    
+    async def _fetch_profile_html(self, client, profile_url):
+        """Fetch a NOC profile page and parse it into an lxml tree"""
+        response = await client.get(profile_url)
+        response.raise_for_status()
+        return lxml_html.fromstring(response.content)
     
-    def _extract_profile_details(self, page, profile_url):
+    async def _extract_profile_details(self, client, profile_url):
         """Extract detailed profile information from a NOC profile page"""
         profile_data = {
             'example_titles': [],
@@ -292,46 +509,30 @@ class NOCScraper:
             'minor_group': ''
         }
         
+        # Parse the page once; every section below is an XPath query on the same tree.
+        # Fetch errors propagate so the profile is not recorded as done and is retried next run.
+        tree = await self._fetch_profile_html(client, profile_url)
+        
         try:
-            # Create a new page for the profile
-            profile_page = page.context.new_page()
-            profile_page.goto(profile_url, wait_until='domcontentloaded', timeout=30000)
-            
-            # Wait for content to load
-            time.sleep(1)
-            
             # Extract Example Titles
             try:
-                title_elements = profile_page.locator('h4:has-text("Example titles") ~ ul li, h4:has-text("Example titles") ~ div li').all()
-                profile_data['example_titles'] = [elem.inner_text().strip() for elem in title_elements if elem.is_visible()]
+                title_elements = _XPATHS['example_titles'](tree)
+                # Keep the visibility filter here only: the full index of titles sits in the same
+                # list but collapsed, and example titles are the visible part of it
+                profile_data['example_titles'] = [_text(elem) for elem in title_elements if _is_rendered(elem)]
             except:
                 pass
             
             # Extract Index of Titles (if available)
             try:
-                # Look for the "Index of titles" button/link - it's usually a clickable element near "Example titles"
-                # Try multiple possible selectors
-                index_trigger = profile_page.locator('text="Index of titles"').first
-                
-                if index_trigger.count() > 0:
-                    # Click to expand the full index
-                    index_trigger.click()
-                    time.sleep(1)  # Wait for expansion animation
-                    
-                    # After clicking, try to get all visible list items under Example titles section
-                    # The full list should now be visible
-                    all_title_elements = profile_page.locator('h4:has-text("Example titles") ~ ul li, h4:has-text("Example titles") ~ div li, h4:has-text("Example titles") + * li').all()
-                    all_titles = [elem.inner_text().strip() for elem in all_title_elements if elem.is_visible() and elem.inner_text().strip()]
+                # The full index ships in the page but stays collapsed behind "Index of titles",
+                # so take every title under Example titles, including the hidden ones
+                if _XPATHS['index_of_titles_button'](tree):
+                    all_title_elements = _XPATHS['index_of_titles'](tree)
+                    all_titles = [_text(elem) for elem in all_title_elements if _text(elem)]
                     
                     # Remove duplicates while preserving order
-                    seen = set()
-                    unique_titles = []
-                    for title in all_titles:
-                        if title not in seen and title:
-                            seen.add(title)
-                            unique_titles.append(title)
-                    
-                    profile_data['index_of_titles'] = unique_titles
+                    profile_data['index_of_titles'] = list(dict.fromkeys(all_titles))
                 else:
                     # If no index button found, index_of_titles will be empty
                     profile_data['index_of_titles'] = []
@@ -340,89 +541,56 @@ class NOCScraper:
             
             # Extract Main Duties
             try:
-                duty_elements = profile_page.locator('h4:has-text("Main duties") ~ ul li, h5:has-text("This group performs") ~ ul li').all()
-                profile_data['main_duties'] = [elem.inner_text().strip() for elem in duty_elements if elem.is_visible()]
+                duty_elements = _XPATHS['main_duties'](tree)
+                profile_data['main_duties'] = [_text(elem) for elem in duty_elements]
             except:
                 pass
             
             # Extract Employment Requirements
             try:
-                req_section = profile_page.locator('h4:has-text("Employment requirements")').first
-                if req_section.count() > 0:
-                    # Get the next sibling elements (could be paragraphs or lists)
-                    req_content = []
-                    
-                    # Try to get list items
-                    req_list = profile_page.locator('h4:has-text("Employment requirements") ~ ul li').all()
-                    if req_list:
-                        req_content = [elem.inner_text().strip() for elem in req_list if elem.is_visible()]
-                    else:
-                        # Try to get paragraphs
-                        req_paras = profile_page.locator('h4:has-text("Employment requirements") ~ p').all()
-                        req_content = [elem.inner_text().strip() for elem in req_paras if elem.is_visible()]
-                    
-                    profile_data['employment_requirements'] = ' | '.join(req_content) if req_content else ''
+                # Prefer list items, fall back to paragraphs
+                req_elements = (
+                    _XPATHS['employment_requirements_items'](tree)
+                    or _XPATHS['employment_requirements_paragraphs'](tree)
+                )
+                req_content = [_text(elem) for elem in req_elements]
+                profile_data['employment_requirements'] = ' | '.join(req_content) if req_content else ''
             except:
                 pass
             
             # Extract Additional Information
             try:
-                add_info_section = profile_page.locator('h4:has-text("Additional information")').first
-                if add_info_section.count() > 0:
-                    add_info_list = profile_page.locator('h4:has-text("Additional information") ~ ul li').all()
-                    if add_info_list:
-                        add_info_content = [elem.inner_text().strip() for elem in add_info_list if elem.is_visible()]
-                        profile_data['additional_information'] = ' | '.join(add_info_content)
-                    else:
-                        add_info_paras = profile_page.locator('h4:has-text("Additional information") ~ p').all()
-                        if add_info_paras:
-                            add_info_content = [elem.inner_text().strip() for elem in add_info_paras if elem.is_visible()]
-                            profile_data['additional_information'] = ' | '.join(add_info_content)
+                add_info_elements = (
+                    _XPATHS['additional_information_items'](tree)
+                    or _XPATHS['additional_information_paragraphs'](tree)
+                )
+                add_info_content = [_text(elem) for elem in add_info_elements]
+                profile_data['additional_information'] = ' | '.join(add_info_content)
             except:
                 pass
             
             # Extract Exclusions
             try:
-                exclusion_elements = profile_page.locator('h4:has-text("Exclusions") ~ ul li').all()
-                profile_data['exclusions'] = [elem.inner_text().strip() for elem in exclusion_elements if elem.is_visible()]
+                exclusion_elements = _XPATHS['exclusions'](tree)
+                profile_data['exclusions'] = [_text(elem) for elem in exclusion_elements]
             except:
                 pass
             
             # Extract Breakdown Summary
             try:
-                # Broad occupational category
-                broad_elem = profile_page.locator('strong:has-text("Broad occupational category") ~ a').first
-                if broad_elem.count() > 0:
-                    profile_data['broad_category'] = broad_elem.inner_text().strip()
-                
-                # TEER
-                teer_elem = profile_page.locator('strong:has-text("TEER")').first
-                if teer_elem.count() > 0:
-                    # Get the parent element and extract text after the strong tag
-                    parent = teer_elem.locator('..').first
-                    if parent.count() > 0:
-                        text = parent.inner_text().strip()
-                        profile_data['teer'] = text.replace('TEER', '').strip()
-                
-                # Major group
-                major_elem = profile_page.locator('strong:has-text("Major group") ~ a').first
-                if major_elem.count() > 0:
-                    profile_data['major_group'] = major_elem.inner_text().strip()
-                
-                # Sub-major group
-                sub_major_elem = profile_page.locator('strong:has-text("Sub-major group") ~ a').first
-                if sub_major_elem.count() > 0:
-                    profile_data['sub_major_group'] = sub_major_elem.inner_text().strip()
+                # Broad occupational category, major / sub-major / minor group: first link after the label
+                for key in BREAKDOWN_LABELS:
+                    link = _XPATHS[key](tree)
+                    if link:
+                        profile_data[key] = _text(link[0])
                 
-                # Minor group
-                minor_elem = profile_page.locator('strong:has-text("Minor group") ~ a').first
-                if minor_elem.count() > 0:
-                    profile_data['minor_group'] = minor_elem.inner_text().strip()
+                # TEER - the value is the text of the label's parent, after the strong tag
+                teer_parent = _XPATHS['teer'](tree)
+                if teer_parent:
+                    profile_data['teer'] = _text(teer_parent[0]).replace('TEER', '').strip()
             except:
                 pass
             
-            profile_page.close()
-            
         except Exception as e:
             self.errors.append(f"Error extracting profile: {str(e)}")
         
@@ -456,10 +624,10 @@ class NOCScraper:
         data_for_csv = []
         for item in self.noc_data:
             row = item.copy()
-            # Convert list fields to pipe-separated strings
+            # Convert list fields to JSON arrays (lossless, parsed back with json.loads)
             for key in ['example_titles', 'index_of_titles', 'main_duties', 'exclusions']:
                 if key in row and isinstance(row[key], list):
-                    row[key] = ' | '.join(row[key])
+                    row[key] = json.dumps(row[key], ensure_ascii=False) if row[key] else ''
             data_for_csv.append(row)
         
         df = pd.DataFrame(data_for_csv)
@@ -467,6 +635,21 @@ class NOCScraper:
         print(f"\n💾 Data saved to {filename}")
         print(f"   Total records: {len(df)}")
     
+    def save_to_parquet(self, filename='noc_data.parquet'):
+        """Save scraped data to Parquet (list fields kept as native arrays)"""
+        if not self.noc_data:
+            print("❌ No data to save")
+            return
+        
+        df = pd.DataFrame(self.noc_data)
+        # Entries without a profile have no list fields - store them as empty lists
+        for key in ['example_titles', 'index_of_titles', 'main_duties', 'exclusions']:
+            if key in df:
+                df[key] = df[key].map(lambda value: value if isinstance(value, list) else [])
+        df.to_parquet(filename, index=False)
+        print(f"\n💾 Data saved to {filename}")
+        print(f"   Total records: {len(df)}")
+    
     def save_to_json(self, filename='noc_data.json'):
         """Save scraped data to JSON"""
         if not self.noc_data:
@@ -502,8 +685,13 @@ class NOCScraper:
 
 def main():
     """Main function to run the scraper"""
+    parser = argparse.ArgumentParser(description="Scrape the NOC hierarchy and unit group profiles")
+    parser.add_argument('--fresh', action='store_true',
+                        help="ignore noc_data_full.jsonl from an earlier run and re-scrape every profile")
+    args = parser.parse_args()
+    
     # Set scrape_profiles=True to extract detailed profile information for each NOC
-    scraper = NOCScraper(scrape_profiles=True)
+    scraper = NOCScraper(scrape_profiles=True, resume=not args.fresh)
     
     # Run the scraper (set headless=False to see the browser)
     scraper.scrape(headless=True)
@@ -511,9 +699,10 @@ def main():
     # Print summary
     scraper.print_summary()
     
-    # Save to both CSV and JSON
+    # Save to CSV and JSON, plus Parquet for prepare_embeddings.py
     scraper.save_to_csv('noc_data_full.csv')
     scraper.save_to_json('noc_data_full.json')
+    scraper.save_to_parquet('noc_data_full.parquet')
     
     print("\n✅ Scraping complete!")
 
@@ -3,143 +3,155 @@ Prepare NOC embeddings for semantic search
 This script processes the NOC data and creates embeddings for fast semantic matching
 """
 
+import os
 import json
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import pickle
 from pathlib import Path
 
-print("🔄 Loading NOC data...")
-df = pd.read_csv('noc_data_full.csv')
-
-# Parse all list fields from string to list
-# The data is stored as pipe-separated strings in CSV
-def parse_list_field(x):
-    if pd.isna(x) or x == '' or x == 'nan':
-        return []
-    x_str = str(x).strip()
-    if x_str.startswith('['):
-        # Try to eval as list
-        try:
-            return eval(x_str)
-        except:
-            return []
-    elif '|' in x_str:
-        # Split by pipe and clean
-        return [item.strip() for item in x_str.split('|') if item.strip()]
+MODEL_NAME = 'all-mpnet-base-v2'
+ONNX_MODEL_FILE = 'onnx/model_qint8_avx512_vnni.onnx'
+# Records which model build encoded the corpus; app.py loads the same one for queries
+EMBEDDING_BACKEND_FILE = 'embedding_backend.json'
+
+
+# Searchable text is built column-wise with pandas string ops: each part carries its own
+# trailing space and is "" where the field is absent, so concatenating them matches
+# " ".join over the present parts
+def weighted_part(text, present=True):
+    return (text + " ").where((text != "") & present, "")
+
+def field_text(df, column):
+    return df[column].fillna("").astype(str)
+
+
+def main():
+    # Heavy ML dependencies are imported here so importing this module stays cheap
+    import onnxruntime as ort
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print("🔄 Loading NOC data...")
+    # Parquet keeps the list fields (main_duties, example_titles, exclusions) as native arrays
+    df = pd.read_parquet('noc_data_full.parquet')
+
+    # Create weighted searchable text - focus on main duties but include all fields
+    print("📝 Creating weighted searchable text for each NOC...")
+    title = df['title'].astype(str)
+    description = df['description'].astype(str)
+    has_duties = df['main_duties'].str.len() > 0
+    duties_joined = df['main_duties'].map(" ".join)
+    titles_joined = df['example_titles'].map(" ".join)
+    exclusions_joined = df['exclusions'].map(lambda items: " ".join(items[:3]))  # First 3 only
+
+    parts = [
+        # Title - weight 2x (repeat twice for higher importance)
+        weighted_part("Title: " + title + " " + title),
+        # Description - weight 1.5x
+        weighted_part("Description: " + description),
+        weighted_part(description.str[:200]),  # Partial repeat for weight
+        # Main duties - weight 3x (HIGHEST priority - repeat 3 times)
+        weighted_part("Main duties: " + duties_joined, has_duties),
+        weighted_part("Responsibilities: " + duties_joined, has_duties),  # Synonym for matching
+        weighted_part("Key duties: " + duties_joined, has_duties),  # Additional weight
+        # Example titles - weight 1x
+        weighted_part("Example titles: " + titles_joined, df['example_titles'].str.len() > 0),
+        # Employment requirements - weight 1x
+        weighted_part("Requirements: " + field_text(df, 'employment_requirements'), field_text(df, 'employment_requirements') != ""),
+        # Additional information - weight 0.5x
+        weighted_part(field_text(df, 'additional_information').str[:100]),  # Partial for lower weight
+        # Exclusions - weight 0.5x (lower priority)
+        weighted_part("Exclusions: " + exclusions_joined, df['exclusions'].str.len() > 0),
+        # Hierarchy info - weight 1x
+        weighted_part("Category: " + field_text(df, 'broad_category'), field_text(df, 'broad_category') != ""),
+        weighted_part("Group: " + field_text(df, 'major_group'), field_text(df, 'major_group') != ""),
+    ]
+    df['searchable_text'] = parts[0].str.cat(parts[1:]).str[:-1]
+
+    # Load embedding model
+    print("🤖 Loading Sentence Transformer model (this may take a minute)...")
+    if torch.cuda.is_available():
+        # On a GPU, run the PyTorch model in half precision - recorded below so the app encodes
+        # queries with the same PyTorch weights (float16 on a GPU, float32 on CPU, where the
+        # difference is negligible against the float16-stored, renormalized corpus)
+        model = SentenceTransformer(MODEL_NAME, device='cuda').half()
+        backend = {'model': MODEL_NAME, 'backend': 'torch', 'precision': 'float16'}
     else:
-        return []
-
-df['main_duties_list'] = df['main_duties'].apply(parse_list_field)
-df['example_titles_list'] = df['example_titles'].apply(parse_list_field)
-df['exclusions_list'] = df['exclusions'].apply(parse_list_field)
-
-# Create weighted searchable text - focus on main duties but include all fields
-print("📝 Creating weighted searchable text for each NOC...")
-def create_searchable_text(row):
-    parts = []
-    
-    # Title - weight 2x (repeat twice for higher importance)
-    parts.append(f"Title: {row['title']} {row['title']}")
-    
-    # Description - weight 1.5x
-    parts.append(f"Description: {row['description']}")
-    parts.append(row['description'][:200])  # Partial repeat for weight
-    
-    # Main duties - weight 3x (HIGHEST priority - repeat 3 times)
-    if row['main_duties_list']:
-        main_duties_text = " ".join(row['main_duties_list'])
-        parts.append(f"Main duties: {main_duties_text}")
-        parts.append(f"Responsibilities: {main_duties_text}")  # Synonym for matching
-        parts.append(f"Key duties: {main_duties_text}")  # Additional weight
-    
-    # Example titles - weight 1x
-    if row['example_titles_list']:
-        parts.append("Example titles: " + " ".join(row['example_titles_list']))
-    
-    # Employment requirements - weight 1x
-    if pd.notna(row['employment_requirements']) and row['employment_requirements']:
-        parts.append(f"Requirements: {row['employment_requirements']}")
-    
-    # Additional information - weight 0.5x
-    if pd.notna(row['additional_information']) and row['additional_information']:
-        parts.append(str(row['additional_information'])[:100])  # Partial for lower weight
-    
-    # Exclusions - weight 0.5x (lower priority)
-    if row['exclusions_list']:
-        parts.append("Exclusions: " + " ".join(row['exclusions_list'][:3]))  # First 3 only
-    
-    # Hierarchy info - weight 1x
-    if pd.notna(row['broad_category']) and row['broad_category']:
-        parts.append(f"Category: {row['broad_category']}")
-    if pd.notna(row['major_group']) and row['major_group']:
-        parts.append(f"Group: {row['major_group']}")
-    
-    return " ".join(filter(None, parts))
-
-df['searchable_text'] = df.apply(create_searchable_text, axis=1)
-
-# Load embedding model - upgraded for better accuracy
-print("🤖 Loading Sentence Transformer model (this may take a minute)...")
-model = SentenceTransformer('all-mpnet-base-v2')  # Higher accuracy model for semantic understanding
-
-# Generate embeddings for full NOC profiles
-print(f"🧮 Generating profile embeddings for {len(df)} NOC codes...")
-embeddings = model.encode(
-    df['searchable_text'].tolist(),
-    show_progress_bar=True,
-    batch_size=32
-)
-
-# Generate individual duty embeddings for duty-by-duty matching
-print(f"🎯 Generating duty-level embeddings for precise matching...")
-all_duties = []
-duty_to_noc_map = []  # Track which NOC each duty belongs to
-
-for idx, row in df.iterrows():
-    if row['main_duties_list']:
-        for duty in row['main_duties_list']:
-            if duty and duty.strip():
-                all_duties.append(duty)
-                duty_to_noc_map.append(idx)
-
-duty_embeddings = model.encode(
-    all_duties,
-    show_progress_bar=True,
-    batch_size=32
-)
-
-print(f"   ✓ Created {len(all_duties)} individual duty embeddings")
-
-# Save embeddings and processed data
-print("💾 Saving embeddings and processed data...")
-np.save('noc_embeddings.npy', embeddings)
-np.save('duty_embeddings.npy', duty_embeddings)
-
-# Save metadata with all fields
-metadata = {
-    'noc_codes': df['noc_code'].tolist(),
-    'titles': df['title'].tolist(),
-    'descriptions': df['description'].tolist(),
-    'main_duties': df['main_duties_list'].tolist(),
-    'example_titles': df['example_titles_list'].tolist(),
-    'employment_requirements': df['employment_requirements'].tolist(),
-    'additional_information': df['additional_information'].tolist(),
-    'exclusions': df['exclusions_list'].tolist(),
-    'urls': df['url'].tolist(),
-    'searchable_texts': df['searchable_text'].tolist(),
-    'all_duties': all_duties,
-    'duty_to_noc_map': duty_to_noc_map
-}
-
-with open('noc_metadata.pkl', 'wb') as f:
-    pickle.dump(metadata, f)
-
-print(f"✅ Successfully prepared embeddings for {len(df)} NOC codes!")
-print(f"   Profile embedding shape: {embeddings.shape}")
-print(f"   Duty embedding shape: {duty_embeddings.shape}")
-print(f"   Files created:")
-print(f"   - noc_embeddings.npy ({embeddings.nbytes / 1024 / 1024:.2f} MB)")
-print(f"   - duty_embeddings.npy ({duty_embeddings.nbytes / 1024 / 1024:.2f} MB)")
-print(f"   - noc_metadata.pkl")
+        # On CPU, use the quantized ONNX graph
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = os.cpu_count() or 1
+        model = SentenceTransformer(
+            MODEL_NAME,
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_MODEL_FILE, "session_options": sess_options}
+        )
+        backend = {'model': MODEL_NAME, 'backend': 'onnx', 'file_name': ONNX_MODEL_FILE}
+
+    # Collect individual duties for duty-by-duty matching
+    all_duties = []
+    duty_to_noc_map = []  # Track which NOC each duty belongs to
+
+    for idx, duties in enumerate(df['main_duties'].tolist()):
+        clean = [duty for duty in duties if duty and duty.strip()]
+        all_duties.extend(clean)
+        duty_to_noc_map.extend([idx] * len(clean))
+
+    # Encode profiles and duties in a single call - encode() sorts all texts by length,
+    # so long profiles and short duties are each batched with similar-length neighbours
+    print(f"🧮 Generating embeddings for {len(df)} NOC profiles and {len(all_duties)} duties...")
+    # Unit-length vectors, so cosine similarity downstream is a plain dot product.
+    # encode() already runs under torch.inference_mode on the GPU branch; no autocast is added.
+    all_embeddings = model.encode(
+        df['searchable_text'].tolist() + all_duties,
+        show_progress_bar=True,
+        batch_size=64,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+    embeddings = all_embeddings[:len(df)]
+    duty_embeddings = all_embeddings[len(df):]
+
+    print(f"   ✓ Created {len(all_duties)} individual duty embeddings")
+
+    # Save embeddings and processed data
+    # Stored as float16 to halve file size and load time; the app upcasts to float32 for the matmul
+    print("💾 Saving embeddings and processed data...")
+    embeddings = embeddings.astype(np.float16)
+    duty_embeddings = duty_embeddings.astype(np.float16)
+    np.save('noc_embeddings.npy', embeddings)
+    np.save('duty_embeddings.npy', duty_embeddings)
+
+    # Save metadata with all fields
+    # One row per NOC; the flat duty list is rebuilt from main_duties at load time
+    metadata = pd.DataFrame({
+        'noc_codes': df['noc_code'],
+        'titles': df['title'],
+        'descriptions': df['description'],
+        'main_duties': df['main_duties'],
+        'example_titles': df['example_titles'],
+        'employment_requirements': df['employment_requirements'],
+        'additional_information': df['additional_information'],
+        'exclusions': df['exclusions'],
+        'urls': df['url']
+    })
+    metadata.to_feather('noc_metadata.feather', compression='uncompressed')
+    # Duties are appended NOC by NOC, so each NOC owns the contiguous rows
+    # duty_offsets[i]:duty_offsets[i + 1] of all_duties / duty_embeddings
+    duty_counts = np.bincount(duty_to_noc_map, minlength=len(df))
+    np.save('duty_offsets.npy', np.concatenate([[0], np.cumsum(duty_counts)]).astype(np.int32))
+    with open(EMBEDDING_BACKEND_FILE, 'w', encoding='utf-8') as f:
+        json.dump(backend, f, indent=2)
+
+    print(f"✅ Successfully prepared embeddings for {len(df)} NOC codes!")
+    print(f"   Profile embedding shape: {embeddings.shape}")
+    print(f"   Duty embedding shape: {duty_embeddings.shape}")
+    print(f"   Files created:")
+    print(f"   - noc_embeddings.npy ({embeddings.nbytes / 1024 / 1024:.2f} MB)")
+    print(f"   - duty_embeddings.npy ({duty_embeddings.nbytes / 1024 / 1024:.2f} MB)")
+    print(f"   - noc_metadata.feather")
+    print(f"   - duty_offsets.npy")
+    print(f"   - {EMBEDDING_BACKEND_FILE} ({backend['backend']} backend)")
+
+
+if __name__ == "__main__":
+    main()
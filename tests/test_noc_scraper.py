@@ -0,0 +1,163 @@
+"""Offline tests for the NOC profile parser, run against saved HTML fixtures"""
+
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+
+from noc_scraper_enhanced import NOCScraper, PROFILE_PARSER_VERSION
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+PROFILE_URL = 'https://noc.esdc.gc.ca/Structure/NOCProfile?code=11100'
+
+
+def extract_profile(fixture_name, tmp_path):
+    """Run _extract_profile_details against a fixture served by a mock transport"""
+    body = (FIXTURES / fixture_name).read_bytes()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    scraper = NOCScraper(progress_file=tmp_path / 'progress.jsonl')
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await scraper._extract_profile_details(client, PROFILE_URL)
+
+    return asyncio.run(run()), scraper.errors
+
+
+def test_sections_stop_at_next_heading(tmp_path):
+    profile, errors = extract_profile('noc_profile.html', tmp_path)
+
+    assert errors == []
+    assert profile['example_titles'] == ['Financial auditor', 'Chartered professional accountant (CPA)']
+    assert profile['main_duties'] == [
+        'Examine and analyze journals, ledgers and other financial records',
+        'Prepare detailed reports on audit findings',
+        'Plan, set up and administer accounting systems',
+    ]
+    assert profile['employment_requirements'] == 'A university degree in business administration is usually required.'
+    assert profile['additional_information'] == 'Progression to management positions is possible with experience.'
+    assert profile['exclusions'] == ['Financial managers (10010)', 'Bookkeepers (12200)']
+
+
+def test_index_of_titles_includes_collapsed_titles(tmp_path):
+    profile, _ = extract_profile('noc_profile.html', tmp_path)
+
+    assert profile['index_of_titles'] == [
+        'Financial auditor',
+        'Chartered professional accountant (CPA)',
+        'Accountant, public',
+    ]
+
+
+def test_breakdown_fields(tmp_path):
+    profile, _ = extract_profile('noc_profile.html', tmp_path)
+
+    assert profile['broad_category'] == '1 Business, finance and administration occupations'
+    assert profile['teer'] == '1'
+    assert profile['major_group'] == '11 Professional occupations in finance and business'
+    assert profile['sub_major_group'] == '111 Professional occupations in finance'
+    assert profile['minor_group'] == '1110 Auditors, accountants and investment professionals'
+
+
+class FixturePage:
+    """Stands in for the Playwright page - _extract_hierarchy only reads page.content()"""
+
+    def __init__(self, fixture_name):
+        self._html = (FIXTURES / fixture_name).read_text(encoding='utf-8')
+
+    def content(self):
+        return self._html
+
+
+def test_hierarchy_records_in_document_order(tmp_path):
+    scraper = NOCScraper(progress_file=tmp_path / 'progress.jsonl')
+    scraper._extract_hierarchy(FixturePage('noc_hierarchy.html'))
+
+    assert scraper.errors == []
+    # Sections inside the closed "2" category are not rendered; the repeated 11100 is dropped
+    assert [(entry['noc_code'], entry['level']) for entry in scraper.noc_data] == [
+        ('1', 'Broad Occupational Category'),
+        ('11', 'Major Group'),
+        ('2', 'Broad Occupational Category'),
+        ('11100', 'Unit Group'),
+        ('11101', 'Unit Group'),
+    ]
+
+
+def test_hierarchy_titles_descriptions_and_urls(tmp_path):
+    scraper = NOCScraper(progress_file=tmp_path / 'progress.jsonl')
+    scraper._extract_hierarchy(FixturePage('noc_hierarchy.html'))
+    entries = {entry['noc_code']: entry for entry in scraper.noc_data}
+
+    assert entries['1']['title'] == 'Business, finance and administration occupations'
+    assert entries['1']['description'] == 'This broad category comprises occupations concerned with business and finance.'
+    assert entries['11']['description'] == entries['11']['title']
+    assert entries['11']['url'] == 'https://noc.esdc.gc.ca/Structure/Hierarchy#11'
+
+    assert entries['11100']['title'] == 'Financial auditors and accountants'
+    assert entries['11100']['url'] == 'https://noc.esdc.gc.ca/Structure/NOCProfile?GocTemplateCulture=en-CA&code=11100'
+    # No nocTitle span - the title falls back to the full text minus the leading code
+    assert entries['11101']['title'] == 'Financial and investment analysts'
+    assert entries['11101']['url'] == 'https://noc.esdc.gc.ca/Structure/Hierarchy'
+
+
+def scrape_profiles(progress_file, **kwargs):
+    """Run profile extraction for two entries against the profile fixture; return the fetched URLs"""
+    body = (FIXTURES / 'noc_profile.html').read_bytes()
+    fetched = []
+
+    def handler(request):
+        fetched.append(str(request.url))
+        return httpx.Response(200, content=body)
+
+    scraper = NOCScraper(progress_file=progress_file, **kwargs)
+    scraper.noc_data = [
+        {'noc_code': code, 'url': f'https://noc.esdc.gc.ca/Structure/NOCProfile?code={code}'}
+        for code in ('11100', '11101')
+    ]
+    original_client = httpx.AsyncClient
+
+    class MockClient(original_client):
+        def __init__(self, *args, **client_kwargs):
+            client_kwargs.pop('http2', None)
+            super().__init__(*args, transport=httpx.MockTransport(handler), **client_kwargs)
+
+    httpx.AsyncClient = MockClient
+    try:
+        scraper._extract_all_profiles()
+    finally:
+        httpx.AsyncClient = original_client
+    return scraper, fetched
+
+
+def test_resume_skips_current_profiles_and_refetches_stale_ones(tmp_path):
+    progress_file = tmp_path / 'progress.jsonl'
+    current = {'noc_code': '11100', 'url': 'saved', 'main_duties': ['Saved duty']}
+    stale = {'noc_code': '11101', 'url': 'saved', 'main_duties': ['Parsed by old XPaths']}
+    progress_file.write_text(
+        json.dumps({'parser_version': PROFILE_PARSER_VERSION, 'entry': current}) + '\n'
+        + json.dumps(stale) + '\n',
+        encoding='utf-8'
+    )
+
+    scraper, fetched = scrape_profiles(progress_file)
+
+    assert fetched == ['https://noc.esdc.gc.ca/Structure/NOCProfile?code=11101']
+    assert scraper.noc_data[0]['main_duties'] == ['Saved duty']
+    assert scraper.noc_data[1]['main_duties'][0].startswith('Examine and analyze')
+
+
+def test_fresh_run_ignores_progress_file(tmp_path):
+    progress_file = tmp_path / 'progress.jsonl'
+    saved = {'noc_code': '11100', 'url': 'saved', 'main_duties': ['Saved duty']}
+    progress_file.write_text(
+        json.dumps({'parser_version': PROFILE_PARSER_VERSION, 'entry': saved}) + '\n', encoding='utf-8'
+    )
+
+    scraper, fetched = scrape_profiles(progress_file, resume=False)
+
+    assert len(fetched) == 2
+    records = [json.loads(line) for line in progress_file.read_text(encoding='utf-8').splitlines()]
+    assert sorted(record['entry']['noc_code'] for record in records) == ['11100', '11101']
+    assert all(record['parser_version'] == PROFILE_PARSER_VERSION for record in records)